@@ -2,7 +2,7 @@ import os
 import re
 import json
 import logging
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Iterator, Any
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -11,26 +11,15 @@ env_path = Path(__file__).parent / ".env"
 load_dotenv(dotenv_path=env_path)
 
 
-_spacy_nlp = None
 _openai_client = None
+_analyzer_instance = None
 _verbose = True
 
 def get_spacy():
-
-    global _spacy_nlp
-    if _spacy_nlp is None:
-        import spacy
-        try:
-            _spacy_nlp = spacy.load("en_core_web_sm")
-            if _verbose:
-                print("spaCy model loaded.")
-        except OSError as e:
-
-            raise RuntimeError(
-                "spaCy model 'en_core_web_sm' not found. "
-                "Ensure it was downloaded during Docker build."
-            ) from e
-    return _spacy_nlp
+    # Reuse the moderation pipeline's pipeline object so each process (and
+    # every forked pool worker) holds a single copy of en_core_web_sm.
+    from shared.model_manager import get_spacy as get_shared_spacy
+    return get_shared_spacy()
 
 def get_openai_client():
 
@@ -46,7 +35,7 @@ def get_openai_client():
 try:
     from .models import (
         SentenceType, SupportLevel, SentenceRole,
-        SentenceAnalysis, ComponentScore, MLFeatures, StrengthReport,
+        SentenceAnalysis, ComponentScore, MLFeatures, MLStageResult, StrengthReport,
         AuditEntry, LogicChainNode, WeaknessReport, ConsistencyIssue, BiasAnalysis
     )
     from .vocabularies import (
@@ -58,12 +47,12 @@ try:
         OVERCONFIDENCE_INDICATORS
     )
     from .prompts import SYSTEM_PROMPT, ANALYSIS_PROMPT_TEMPLATE
-    from .templates import get_embedding_vote, classify_by_embedding
+    from .templates import get_embedding_votes, classify_by_embedding
 except ImportError:
 
     from models import (
         SentenceType, SupportLevel, SentenceRole,
-        SentenceAnalysis, ComponentScore, MLFeatures, StrengthReport,
+        SentenceAnalysis, ComponentScore, MLFeatures, MLStageResult, StrengthReport,
         AuditEntry, LogicChainNode, WeaknessReport, ConsistencyIssue, BiasAnalysis
     )
     from vocabularies import (
@@ -75,7 +64,7 @@ except ImportError:
         OVERCONFIDENCE_INDICATORS
     )
     from prompts import SYSTEM_PROMPT, ANALYSIS_PROMPT_TEMPLATE
-    from templates import get_embedding_vote, classify_by_embedding
+    from templates import get_embedding_votes, classify_by_embedding
 
 
 class StrengthAnalyzer:
@@ -96,6 +85,10 @@ class StrengthAnalyzer:
             print(message)
     
     def analyze(self, thesis_text: str) -> StrengthReport:
+        ml_stage = self.run_ml_stage(thesis_text)
+        return self.build_report(thesis_text, ml_stage, self.run_llm_stage(thesis_text, ml_stage))
+    
+    def run_ml_stage(self, thesis_text: str) -> MLStageResult:
 
         self._log("\n" + "="*60)
         self._log("THESIS STRENGTH ANALYSIS")
@@ -125,9 +118,45 @@ class StrengthAnalyzer:
         self._log(f"   -> Risk Awareness: {risk_score.score}/20")
         self._log(f"   -> Actionability: {action_score.score}/20")
         
-
-
-        llm_result = self._llm_analyze(thesis_text, ml_features, sentence_analyses)
+        return MLStageResult(
+            ml_features=ml_features,
+            sentence_analyses=sentence_analyses,
+            evidence_quality=evidence_score,
+            clarity=clarity_score,
+            risk_awareness=risk_score,
+            actionability=action_score
+        )
+    
+    def provisional_sections(self, ml_stage: MLStageResult) -> Iterator[Tuple[str, Any]]:
+        # Replaced by the report's own sections once build_report finishes.
+        yield "ml_features", ml_stage.ml_features.to_dict()
+        
+        ml_type_counts = self._count_sentence_types(ml_stage.sentence_analyses)
+        yield "quick_stats", {
+            "total_sentences": len(ml_stage.sentence_analyses),
+            "facts": ml_type_counts.get(SentenceType.FACT, 0),
+            "assumptions": ml_type_counts.get(SentenceType.ASSUMPTION, 0),
+            "opinions": ml_type_counts.get(SentenceType.OPINION, 0),
+            "projections": ml_type_counts.get(SentenceType.PROJECTION, 0),
+        }
+        
+        yield "component_scores", {
+            "evidence_quality": ml_stage.evidence_quality.to_dict(),
+            "clarity": ml_stage.clarity.to_dict(),
+            "risk_awareness": ml_stage.risk_awareness.to_dict(),
+            "actionability": ml_stage.actionability.to_dict(),
+        }
+    
+    def run_llm_stage(self, thesis_text: str, ml_stage: MLStageResult) -> Dict:
+        return self._llm_analyze(thesis_text, ml_stage.ml_features, ml_stage.sentence_analyses)
+    
+    def build_report(self, thesis_text: str, ml_stage: MLStageResult, llm_result: Dict) -> StrengthReport:
+        ml_features = ml_stage.ml_features
+        sentence_analyses = ml_stage.sentence_analyses
+        evidence_score = ml_stage.evidence_quality
+        clarity_score = ml_stage.clarity
+        risk_score = ml_stage.risk_awareness
+        action_score = ml_stage.actionability
         
 
         coherence_score = ComponentScore(
@@ -288,78 +317,101 @@ class StrengthAnalyzer:
                 count += text_lower.count(term.lower())
         return count
     
-    def _classify_sentences_ml(self, sentences: List[str]) -> Tuple[List[SentenceAnalysis], List[int]]:
-        analyses = []
-        ambiguous = []
+    def _score_sentence_patterns(self, sentence: str, sent_lower: str) -> Dict[SentenceType, int]:
+        pattern_scores = {
+            SentenceType.FACT: 0,
+            SentenceType.OPINION: 0,
+            SentenceType.ASSUMPTION: 0,
+            SentenceType.PROJECTION: 0,
+            SentenceType.CONTEXT: 0
+        }
+        
+        for indicator in FACT_INDICATORS:
+            if indicator in sent_lower:
+                pattern_scores[SentenceType.FACT] += 2
+        
+        for ref in FINANCIAL_STATEMENT_REFS:
+            if ref.lower() in sent_lower:
+                pattern_scores[SentenceType.FACT] += 3
+        
+        for source in CREDIBLE_SOURCES:
+            if source.lower() in sent_lower:
+                pattern_scores[SentenceType.FACT] += 2
         
-        for i, sentence in enumerate(sentences):
-            sent_lower = sentence.lower()
-            
 
-            pattern_scores = {
-                SentenceType.FACT: 0,
-                SentenceType.OPINION: 0,
-                SentenceType.ASSUMPTION: 0,
-                SentenceType.PROJECTION: 0,
-                SentenceType.CONTEXT: 0
-            }
-            
-            for indicator in FACT_INDICATORS:
-                if indicator in sent_lower:
-                    pattern_scores[SentenceType.FACT] += 2
-            
-            for ref in FINANCIAL_STATEMENT_REFS:
-                if ref.lower() in sent_lower:
-                    pattern_scores[SentenceType.FACT] += 3
-            
-            for source in CREDIBLE_SOURCES:
-                if source.lower() in sent_lower:
-                    pattern_scores[SentenceType.FACT] += 2
-            
+        if re.search(r'\d+\.?\d*%', sentence):
+            pattern_scores[SentenceType.FACT] += 3
+        if re.search(r'\$[\d,]+', sentence) or re.search(r'₹[\d,]+', sentence):
+            pattern_scores[SentenceType.FACT] += 2
+        
 
-            if re.search(r'\d+\.?\d*%', sentence):
-                pattern_scores[SentenceType.FACT] += 3
-            if re.search(r'\$[\d,]+', sentence) or re.search(r'₹[\d,]+', sentence):
+        for pattern in TIME_BOUND_PATTERNS:
+            if re.search(pattern, sentence, re.IGNORECASE):
                 pattern_scores[SentenceType.FACT] += 2
-            
+                break
+        
+        for indicator in OPINION_INDICATORS:
+            if indicator in sent_lower:
+                pattern_scores[SentenceType.OPINION] += 3
+        
+        for indicator in ASSUMPTION_INDICATORS:
+            if indicator in sent_lower:
+                pattern_scores[SentenceType.ASSUMPTION] += 3
+        
+        for indicator in PROJECTION_INDICATORS:
+            if indicator in sent_lower:
+                pattern_scores[SentenceType.PROJECTION] += 2
+        
 
-            for pattern in TIME_BOUND_PATTERNS:
-                if re.search(pattern, sentence, re.IGNORECASE):
-                    pattern_scores[SentenceType.FACT] += 2
-                    break
-            
-            for indicator in OPINION_INDICATORS:
-                if indicator in sent_lower:
-                    pattern_scores[SentenceType.OPINION] += 3
-            
-            for indicator in ASSUMPTION_INDICATORS:
-                if indicator in sent_lower:
-                    pattern_scores[SentenceType.ASSUMPTION] += 3
-            
-            for indicator in PROJECTION_INDICATORS:
-                if indicator in sent_lower:
-                    pattern_scores[SentenceType.PROJECTION] += 2
-            
+        if " will " in sent_lower or " would " in sent_lower:
+            pattern_scores[SentenceType.PROJECTION] += 1
+        
+
+        for conn in CAUSAL_CONNECTORS["strong_causal"]:
+            if conn in sent_lower:
+                pattern_scores[SentenceType.CONTEXT] += 1
+                break
+        
+        return pattern_scores
+    
+    def _classify_sentences_ml(self, sentences: List[str]) -> Tuple[List[SentenceAnalysis], List[int]]:
+        analyses = []
+        ambiguous = []
+        
 
-            if " will " in sent_lower or " would " in sent_lower:
-                pattern_scores[SentenceType.PROJECTION] += 1
+        all_pattern_scores = []
+        embed_indices = []
+        for i, sentence in enumerate(sentences):
+            pattern_scores = self._score_sentence_patterns(sentence, sentence.lower())
+            all_pattern_scores.append(pattern_scores)
             
+            pattern_max_score = max(pattern_scores.values())
+            pattern_total = sum(pattern_scores.values())
+            use_embeddings = pattern_total < 5 or (pattern_max_score / max(pattern_total, 1)) < 0.7
+            if use_embeddings and len(sentence.strip()) > 20:
+                embed_indices.append(i)
+        
 
-            for conn in CAUSAL_CONNECTORS["strong_causal"]:
-                if conn in sent_lower:
-                    pattern_scores[SentenceType.CONTEXT] += 1
-                    break
+        embed_votes = {}
+        if embed_indices:
+            try:
+                votes = get_embedding_votes([sentences[i] for i in embed_indices])
+                embed_votes = dict(zip(embed_indices, votes))
+            except Exception:
+                embed_votes = {}
+        
+        for i, sentence in enumerate(sentences):
+            sent_lower = sentence.lower()
+            pattern_scores = all_pattern_scores[i]
             
             pattern_max_type = max(pattern_scores, key=pattern_scores.get)
             pattern_max_score = pattern_scores[pattern_max_type]
             pattern_total = sum(pattern_scores.values())
             
 
-            use_embeddings = pattern_total < 5 or (pattern_max_score / max(pattern_total, 1)) < 0.7
-            
-            if use_embeddings and len(sentence.strip()) > 20:
+            embed_scores = embed_votes.get(i)
+            if embed_scores is not None:
                 try:
-                    embed_scores = get_embedding_vote(sentence)
 
                     embed_max = max(embed_scores.values())
                     embed_normalized = {k: v / embed_max * 5 for k, v in embed_scores.items()}
@@ -1246,3 +1298,11 @@ class StrengthAnalyzer:
         
         output.append("=" * 80)
         return "\n".join(output)
+
+
+def get_analyzer() -> StrengthAnalyzer:
+
+    global _analyzer_instance
+    if _analyzer_instance is None:
+        _analyzer_instance = StrengthAnalyzer(verbose=True)
+    return _analyzer_instance
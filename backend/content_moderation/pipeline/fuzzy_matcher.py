@@ -1,3 +1,4 @@
+import re
 from typing import Dict, List
 from rapidfuzz import fuzz, process
 
@@ -78,7 +79,6 @@ class FuzzyMatcher:
             self.WHITELIST_CONTEXTS = []
     
     def _match_context(self, context: str, text: str) -> bool:
-        import re
         context_lower = context.lower()
         text_lower = text.lower()
         if ' ' in context_lower:
@@ -1,7 +1,7 @@
 import json
 import re
 from pathlib import Path
-from typing import List, Set
+from typing import Dict, List, Set
 
 
 class ToxicityChecker:
@@ -17,6 +17,11 @@ class ToxicityChecker:
         self._mockery_patterns: Set[str] = set()
         self._doxxing_patterns: Set[str] = set()
         self._defamation_patterns: Set[str] = set()
+        self._word_terms: Dict[str, Set[str]] = {}
+        self._phrase_terms: Dict[str, Set[str]] = {}
+        self._compiled_terms: Dict[str, re.Pattern] = {}
+        self._phrase_bytes: Dict[str, bytes] = {}
+        self._spam_indicators_b: Set[bytes] = set()
         self._load_patterns()
         self._load_whitelist()
     
@@ -58,6 +63,29 @@ class ToxicityChecker:
                 self._hate_patterns.append(re.compile(pattern, re.IGNORECASE))
             except re.error:
                 pass
+        
+        category_sets = {
+            "severe_profanity": self._severe_profanity,
+            "mild_profanity": self._mild_profanity,
+            "personal_attack": self._personal_attacks,
+            "threat": self._threat_patterns,
+            "harassment": self._harassment_patterns,
+            "mockery": self._mockery_patterns,
+            "doxxing": self._doxxing_patterns,
+        }
+        
+        for category, patterns in category_sets.items():
+            word_terms = {t for t in patterns if ' ' not in t and len(t) <= 8}
+            self._word_terms[category] = word_terms
+            self._phrase_terms[category] = patterns - word_terms
+            
+            for term in word_terms:
+                if term not in self._compiled_terms:
+                    self._compiled_terms[term] = re.compile(r'\b' + re.escape(term) + r'\b')
+            for term in self._phrase_terms[category]:
+                self._phrase_bytes[term] = term.encode('utf-8')
+        
+        self._spam_indicators_b = {ind.encode('utf-8') for ind in self._spam_indicators}
     
     def _check_defamation(self, text_lower: str, result: dict, linguistic_result: dict = None):
         linguistic_result = linguistic_result or {}
@@ -129,26 +157,22 @@ class ToxicityChecker:
                 
         return False
 
-    def _check_pattern_set(self, text_lower: str, patterns: Set[str], 
+    def _check_pattern_set(self, text_lower: str, text_bytes: bytes, 
                            category: str, score: float, result: dict):
-        import re
         matched_any = False
-        for term in patterns:
-            if ' ' not in term and len(term) <= 8:
-                if self._match_single_word(term, text_lower):
-                    self._add_match(result, category, term, score if not matched_any else 0)
-                    matched_any = True
-            else:
-                if self._match_phrase(term, text_lower):
-                    self._add_match(result, category, term, score if not matched_any else 0)
-                    matched_any = True
+        for term in self._word_terms[category]:
+            if self._match_single_word(self._compiled_terms[term], text_lower):
+                self._add_match(result, category, term, score if not matched_any else 0)
+                matched_any = True
+        for term in self._phrase_terms[category]:
+            if self._match_phrase(self._phrase_bytes[term], text_bytes):
+                self._add_match(result, category, term, score if not matched_any else 0)
+                matched_any = True
     
-    def _match_single_word(self, term: str, text: str) -> bool:
-        import re
-        pattern = r'\b' + re.escape(term) + r'\b'
-        return bool(re.search(pattern, text))
+    def _match_single_word(self, compiled: re.Pattern, text: str) -> bool:
+        return compiled.search(text) is not None
 
-    def _match_phrase(self, term: str, text: str) -> bool:
+    def _match_phrase(self, term: bytes, text: bytes) -> bool:
         return term in text
 
     def _add_match(self, result: dict, category: str, term: str, score: float):
@@ -166,11 +190,18 @@ class ToxicityChecker:
                 self.WHITELIST_CONTEXTS = data.get("whitelist_contexts", [])
         except Exception:
             self.WHITELIST_CONTEXTS = []
+        
+        self._whitelist_re = (
+            re.compile('|'.join(map(re.escape, self.WHITELIST_CONTEXTS)))
+            if self.WHITELIST_CONTEXTS else None
+        )
 
     WHITELIST_CONTEXTS = []
+    _whitelist_re = None
     
     def check(self, text: str, linguistic_result: dict = None) -> dict:
         text_lower = text.lower()
+        text_bytes = text_lower.encode('utf-8', 'surrogatepass')
         linguistic_result = linguistic_result or {}
         
         result = {
@@ -180,25 +211,23 @@ class ToxicityChecker:
             "matched": []
         }
         
-        is_whitelisted = False
-        for context in self.WHITELIST_CONTEXTS:
-            if context in text_lower:
-                result["skipped_context"] = context
-                is_whitelisted = True
-                break
+        if self._whitelist_re:
+            m = self._whitelist_re.search(text_lower)
+            if m:
+                result["skipped_context"] = m.group(0)
         
         checks = [
-            (self._severe_profanity, "severe_profanity", 0.6),
-            (self._mild_profanity, "mild_profanity", 0.3),  
-            (self._personal_attacks, "personal_attack", 0.5),
-            (self._threat_patterns, "threat", 0.6),
-            (self._harassment_patterns, "harassment", 0.6),
-            (self._mockery_patterns, "mockery", 0.4),
-            (self._doxxing_patterns, "doxxing", 0.7)
+            ("severe_profanity", 0.6),
+            ("mild_profanity", 0.3),  
+            ("personal_attack", 0.5),
+            ("threat", 0.6),
+            ("harassment", 0.6),
+            ("mockery", 0.4),
+            ("doxxing", 0.7)
         ]
 
-        for patterns, category, score in checks:
-            self._check_pattern_set(text_lower, patterns, category, score, result)
+        for category, score in checks:
+            self._check_pattern_set(text_lower, text_bytes, category, score, result)
         
         self._check_defamation(text_lower, result, linguistic_result)
         
@@ -209,7 +238,12 @@ class ToxicityChecker:
                 result["score"] += 0.6
                 break
         
-        spam_count = sum(1 for ind in self._spam_indicators if ind in text_lower)
+        spam_count = 0
+        for ind in self._spam_indicators_b:
+            if ind in text_bytes:
+                spam_count += 1
+                if spam_count >= 2:
+                    break
         if spam_count >= 2:
             result["categories"].append("spam")
             result["score"] += 0.3
@@ -1,20 +1,28 @@
 
 
+import gc
 import os
+import asyncio
 import logging
-from fastapi import FastAPI, HTTPException, UploadFile, File
+import multiprocessing
+from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from fastapi import FastAPI, HTTPException, Request, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
+import orjson
 
 
 from moderator_api import (
     ModerationRequest, ModerationResponse, 
     ManualReviewRequest, ManualReviewResponse,
-    moderate_content, submit_manual_review
+    moderate_content, submit_manual_review, check_trivial_content,
+    get_cached_moderation, cache_moderation
 )
-from analyzer import StrengthAnalyzer
-from models import StrengthReport
+from analyzer import get_analyzer
+from models import MLStageResult, StrengthReport
 
 
 logging.basicConfig(
@@ -24,10 +32,76 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", 1))
+
+MAX_UPLOAD_BYTES = 512 * 1024
+UPLOAD_CHUNK_BYTES = 64 * 1024
+MAX_TEXT_CHARS = MAX_UPLOAD_BYTES
+
+
+def _check_text_size(text: str) -> None:
+    if len(text) > MAX_TEXT_CHARS:
+        raise HTTPException(status_code=413, detail="Thesis text is too large")
+
+
+def _preload_shared_models():
+    # Shared with the forked workers copy-on-write. The SentenceTransformer
+    # is loaded per worker since its thread pools do not survive fork().
+    try:
+        from shared.model_manager import get_spacy
+        get_spacy()
+        
+        from moderator_api import get_moderator
+        get_moderator()
+        
+        get_analyzer()
+    except Exception as e:
+        logger.warning("Model preload failed, workers will load their own: %s", e)
+    
+    # Stops the collector from writing to (and so copying) the shared pages.
+    gc.freeze()
+
+
+def _init_worker() -> bool:
+    try:
+        from shared.model_manager import preload_models
+        preload_models()
+        
+        from moderator_api import get_moderator
+        get_moderator()
+        
+        get_analyzer()
+        return True
+    except Exception as e:
+        logger.warning("Worker warmup partial failure (non-fatal): %s", e)
+        return False
+
+
+def run_ml_stage(text: str) -> MLStageResult:
+    return get_analyzer().run_ml_stage(text)
+
+
+def finish_analysis(text: str, ml_stage: MLStageResult) -> StrengthReport:
+    analyzer = get_analyzer()
+    return analyzer.build_report(text, ml_stage, analyzer.run_llm_stage(text, ml_stage))
+
+
+async def _read_upload(file: UploadFile, limit: int) -> bytes:
+    buf = bytearray()
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_BYTES)
+        if not chunk:
+            return bytes(buf)
+        buf.extend(chunk)
+        if len(buf) > limit:
+            raise HTTPException(status_code=413, detail="File too large")
+
+
 app = FastAPI(
     title="Thesis Content Guard API",
     description="Content Moderation + Thesis Strength Analyzer",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 
@@ -44,20 +118,83 @@ app.add_middleware(
 
 @app.on_event("startup")
 async def startup_event():
-    logger.info("Pre-warming ML models on startup...")
+    logger.info("Starting worker pool and pre-warming ML models...")
+    mp_context = None
+    if "fork" in multiprocessing.get_all_start_methods():
+        mp_context = multiprocessing.get_context("fork")
+    if mp_context is not None:
+        _preload_shared_models()
+    app.state.pool = _new_pool(mp_context)
+    app.state.pool.submit(os.getpid)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    app.state.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _new_pool(mp_context=None) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=WORKER_PROCESSES,
+        mp_context=mp_context,
+        initializer=_init_worker
+    )
+
+
+def _restart_context():
+    # The running API process has live threads, so it must not be forked;
+    # replacement workers start clean and load their own models.
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+async def _run_in_pool(func, *args):
+    pool = app.state.pool
     try:
+        return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+    except BrokenProcessPool:
+        # A dead worker breaks the executor for good, so replace it.
+        if app.state.pool is pool:
+            logger.error("Worker pool broken, starting a new one")
+            app.state.pool = _new_pool(_restart_context())
+            pool.shutdown(wait=False, cancel_futures=True)
+        raise
 
-        from shared.model_manager import get_spacy, get_sentence_transformer
-        get_spacy()
-        get_sentence_transformer()
-        
 
-        from moderator_api import get_moderator
-        get_moderator()
+async def _moderate(text: str) -> ModerationResponse:
+    # Trivial input is answered here, without a trip through the pool.
+    result = check_trivial_content(text)
+    if result is None:
+        result = get_cached_moderation(text)
+    if result is None:
+        result = await _run_in_pool(moderate_content, text)
+        cache_moderation(text, result)
+    return result
+
+
+async def _analyze(text: str) -> StrengthReport:
+    # Only the spaCy/embedding stage runs in the pool; the OpenAI call is
+    # I/O-bound and would otherwise hold a worker for seconds.
+    ml_stage = await _run_in_pool(run_ml_stage, text)
+    return await asyncio.to_thread(finish_analysis, text, ml_stage)
+
+
+async def _stream_analysis_lines(text: str):
+    # A client disconnect cancels this generator where it is suspended, so an
+    # abandoned stream never reaches the OpenAI call.
+    try:
+        ml_stage = await _run_in_pool(run_ml_stage, text)
+        for section, payload in get_analyzer().provisional_sections(ml_stage):
+            yield orjson.dumps({section: payload}) + b"\n"
         
-        logger.info("All models pre-warmed successfully - ready for requests")
+        report = await asyncio.to_thread(finish_analysis, text, ml_stage)
+        for section, payload in report.to_dict().items():
+            yield orjson.dumps({section: payload}) + b"\n"
+        logger.info("Streamed analysis complete")
     except Exception as e:
-        logger.warning(f"Startup warmup partial failure (non-fatal): {e}")
+        logger.error("Streaming analysis failed: %s", e, exc_info=True)
+        yield orjson.dumps({"error": str(e)}) + b"\n"
 
 
 
@@ -68,7 +205,10 @@ async def root():
     return {
         "status": "ok",
         "service": "Thesis Content Guard API",
-        "endpoints": ["/api/moderate", "/api/analyze", "/api/manual-review"]
+        "endpoints": [
+            "/api/moderate", "/api/analyze",
+            "/api/moderate-and-analyze", "/api/manual-review"
+        ]
     }
 
 
@@ -83,23 +223,24 @@ async def health():
 
 
 
-@app.post("/api/moderate", response_model=ModerationResponse)
+@app.post("/api/moderate", responses={200: {"model": ModerationResponse}})
 async def moderate_thesis(request: ModerationRequest):
     try:
-        logger.info(f"Moderating content ({len(request.text)} chars)")
+        logger.info("Moderating content (%d chars)", len(request.text))
         
         if not request.text or len(request.text.strip()) < 10:
             raise HTTPException(status_code=400, detail="Text too short")
+        _check_text_size(request.text)
         
-        result = await run_in_threadpool(moderate_content, request.text)
+        result = await _moderate(request.text)
         
-        logger.info(f"Moderation result: {result.decision} (risk: {result.risk_score:.2f})")
-        return result
+        logger.info("Moderation result: %s (risk: %.2f)", result.decision, result.risk_score)
+        return ORJSONResponse(result.model_dump())
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Moderation failed: {e}", exc_info=True)
+        logger.error("Moderation failed: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -108,7 +249,7 @@ async def moderate_thesis(request: ModerationRequest):
 @app.post("/api/manual-review", response_model=ManualReviewResponse)
 async def request_manual_review(request: ManualReviewRequest):
     try:
-        logger.info(f"Manual review request from {request.user_email}")
+        logger.info("Manual review request from %s", request.user_email)
         
         if not request.user_email or "@" not in request.user_email:
             raise HTTPException(status_code=400, detail="Valid email required")
@@ -119,7 +260,7 @@ async def request_manual_review(request: ManualReviewRequest):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Manual review submission failed: {e}", exc_info=True)
+        logger.error("Manual review submission failed: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -140,12 +281,15 @@ class AnalyzeResponse(BaseModel):
     bias_analysis: dict
 
 
-@app.post("/api/analyze", response_model=AnalyzeResponse)
-async def analyze_thesis(file: UploadFile = File(...)):
+@app.post("/api/analyze", responses={200: {"model": AnalyzeResponse}})
+async def analyze_thesis(request: Request, file: UploadFile = File(...)):
     try:
         logger.info("Starting thesis analysis")
         
-        contents = await file.read()
+        if file.content_type and not file.content_type.startswith("text/"):
+            raise HTTPException(status_code=415, detail="Thesis must be a plain text file")
+        
+        contents = await _read_upload(file, MAX_UPLOAD_BYTES)
         text = contents.decode("utf-8")
         
         if not text or len(text.strip()) < 50:
@@ -154,16 +298,62 @@ async def analyze_thesis(file: UploadFile = File(...)):
                 detail="Thesis text must be at least 50 characters"
             )
         
-        analyzer = StrengthAnalyzer(verbose=True)
-        result = await run_in_threadpool(analyzer.analyze, text)
+        if "application/x-ndjson" in request.headers.get("accept", ""):
+            return StreamingResponse(
+                _stream_analysis_lines(text), media_type="application/x-ndjson"
+            )
+        
+        result = await _analyze(text)
         
-        logger.info(f"Analysis complete: {result.overall_score}/100 ({result.grade})")
-        return result.to_dict()
+        logger.info("Analysis complete: %s/100 (%s)", result.overall_score, result.grade)
+        return ORJSONResponse(result.to_dict())
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Analysis failed: {e}", exc_info=True)
+        logger.error("Analysis failed: %s", e, exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+
+
+class ModerateAndAnalyzeResponse(BaseModel):
+    moderation: ModerationResponse
+    analysis: Optional[AnalyzeResponse] = None
+
+
+@app.post("/api/moderate-and-analyze", responses={200: {"model": ModerateAndAnalyzeResponse}})
+async def moderate_and_analyze(request: ModerationRequest):
+    try:
+        logger.info("Moderating and analyzing content (%d chars)", len(request.text))
+        
+        if not request.text or len(request.text.strip()) < 50:
+            raise HTTPException(
+                status_code=400,
+                detail="Thesis text must be at least 50 characters"
+            )
+        _check_text_size(request.text)
+        
+        moderation = await _moderate(request.text)
+        
+        logger.info("Moderation result: %s (risk: %.2f)", moderation.decision, moderation.risk_score)
+        
+        # Analysis calls the OpenAI API, so it only starts once moderation passes.
+        analysis = None
+        if moderation.can_proceed:
+            report = await _analyze(request.text)
+            logger.info("Analysis complete: %s/100 (%s)", report.overall_score, report.grade)
+            analysis = report.to_dict()
+        
+        return ORJSONResponse({
+            "moderation": moderation.model_dump(),
+            "analysis": analysis
+        })
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Moderate-and-analyze failed: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -174,21 +364,24 @@ async def warmup():
     try:
         logger.info("Warming up models (manual trigger)...")
         
-        from shared.model_manager import get_spacy, get_sentence_transformer
-        get_spacy()
-        get_sentence_transformer()
-        
-        from moderator_api import get_moderator
-        get_moderator()
+        if not await _run_in_pool(_init_worker):
+            return {"status": "warmup failed", "error": "model loading failed, see server logs"}
         
         logger.info("Warmup complete")
         return {"status": "models loaded"}
         
     except Exception as e:
-        logger.error(f"Warmup failed: {e}", exc_info=True)
+        logger.error("Warmup failed: %s", e, exc_info=True)
         return {"status": "warmup failed", "error": str(e)}
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="auto",
+        http="auto",
+        workers=int(os.getenv("WEB_CONCURRENCY", 1)),
+    )
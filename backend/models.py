@@ -178,6 +178,16 @@ class MLFeatures:
             "companies": self.companies_mentioned
         }
 
+@dataclass
+class MLStageResult:
+    ml_features: MLFeatures
+    sentence_analyses: List[SentenceAnalysis]
+    evidence_quality: ComponentScore
+    clarity: ComponentScore
+    risk_awareness: ComponentScore
+    actionability: ComponentScore
+
+
 @dataclass
 class StrengthReport:
     # Overall
@@ -1,11 +1,27 @@
 
 
 import os
-from typing import List, Optional
+import json
+import logging
+import re
+import base64
+import hashlib
+import itertools
+import struct
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+import ahocorasick
 from pydantic import BaseModel
 from content_moderation import ContentModerator
 from content_moderation.config import LIGHTWEIGHT_CONFIG, DEFAULT_CONFIG
 
+logger = logging.getLogger(__name__)
+
 
 
 USE_LIGHTWEIGHT = os.getenv("LIGHTWEIGHT_MODE", "true").lower() == "true"
@@ -13,6 +29,46 @@ USE_LIGHTWEIGHT = os.getenv("LIGHTWEIGHT_MODE", "true").lower() == "true"
 
 _moderator_instance = None
 
+MIN_MODERATION_CHARS = 20
+
+
+MODERATION_CACHE_SIZE = 1024
+_moderation_cache: "OrderedDict[bytes, ModerationResponse]" = OrderedDict()
+_moderation_cache_lock = threading.Lock()
+
+
+_TOXIC_TERMS_PATH = Path(__file__).parent / "content_moderation" / "data" / "toxic_terms.json"
+_TOXIC_TERM_PATTERNS = None
+_toxic_terms_lock = threading.Lock()
+
+_TOXIC_TERM_TABLE = None
+
+# Values are (term_lower, is_word); _TOXIC_AC_KEYS maps terms to category ids.
+_TOXIC_AC = None
+_TOXIC_AC_KEYS: Dict[str, Set[int]] = {}
+
+_PLAIN_WORD = re.compile(r'\w+')
+_WORD_TAIL = re.compile(r'\w*')
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+_ALL_TOXIC_TERMS = "*"
+
+_TOXIC_CATEGORY_KEYS = {
+    "severe_profanity": "severe_profanity",
+    "mild_profanity": "mild_profanity",
+    "personal_attack": "personal_attacks",
+    "hate_speech": "hate_speech_patterns",
+    "threat": "threat_patterns",
+    "harassment": "harassment_patterns",
+    "mockery": "mockery_patterns",
+    "doxxing": "doxxing_patterns",
+    "defamation": "defamation_patterns",
+    "spam": "spam_indicators",
+}
+
 
 class ModerationRequest(BaseModel):
     text: str
@@ -49,56 +105,257 @@ def get_moderator() -> ContentModerator:
     global _moderator_instance
     if _moderator_instance is None:
         config = LIGHTWEIGHT_CONFIG if USE_LIGHTWEIGHT else DEFAULT_CONFIG
-        print(f"[ModeratorAPI] Initializing moderator (lightweight={USE_LIGHTWEIGHT})")
+        logger.debug("Initializing moderator (lightweight=%s)", USE_LIGHTWEIGHT)
         _moderator_instance = ContentModerator(config=config)
+        
+        try:
+            _load_toxic_terms()
+        except Exception as e:
+            logger.warning("Toxic term preload failed: %s", e)
     return _moderator_instance
 
 
+def _moderation_cache_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+
+def get_cached_moderation(text: str) -> Optional[ModerationResponse]:
+    key = _moderation_cache_key(text)
+    with _moderation_cache_lock:
+        response = _moderation_cache.get(key)
+        if response is not None:
+            _moderation_cache.move_to_end(key)
+        return response
+
+
+def cache_moderation(text: str, response: ModerationResponse) -> None:
+    key = _moderation_cache_key(text)
+    with _moderation_cache_lock:
+        _moderation_cache[key] = response
+        _moderation_cache.move_to_end(key)
+        while len(_moderation_cache) > MODERATION_CACHE_SIZE:
+            _moderation_cache.popitem(last=False)
+
+
+def _is_word_term(term_lower: str) -> bool:
+    return ' ' not in term_lower and len(term_lower) <= 15
+
+
+def _build_term_table(toxic_data: dict) -> dict:
+    categories: Dict[str, int] = {}
+    lower: List[str] = []
+    cat_id = array('i')
+    is_word = bytearray()
+    for key, terms in toxic_data.items():
+        if not isinstance(terms, list):
+            continue
+        cid = categories.setdefault(key, len(categories))
+        for term in terms:
+            term_lower = term.lower()
+            lower.append(term_lower)
+            cat_id.append(cid)
+            is_word.append(_is_word_term(term_lower))
+    
+    return {"categories": categories, "lower": lower, "cat_id": cat_id, "is_word": is_word}
+
+
+def _is_ac_term(term_lower: str, is_word: int) -> bool:
+    # Word boundaries are checked by hand, which is only exact for pure \w terms.
+    return not is_word or _PLAIN_WORD.fullmatch(term_lower) is not None
+
+
+def _compile_toxic_terms(table: dict, cid: Optional[int] = None,
+                         skip_ac_terms: bool = False) -> Optional[re.Pattern]:
+    # Alternation order decides which term wins at a position: phrases, longest first.
+    words, phrases = set(), set()
+    for term_lower, term_cid, is_word in zip(table["lower"], table["cat_id"], table["is_word"]):
+        if cid is not None and term_cid != cid:
+            continue
+        if skip_ac_terms and _is_ac_term(term_lower, is_word):
+            continue
+        if is_word:
+            words.add(term_lower)
+        else:
+            phrases.add(term_lower)
+    
+    alternatives = [re.escape(p) for p in sorted(phrases, key=len, reverse=True)]
+    if words:
+        alternatives.append(
+            r'\b(?:' + '|'.join(map(re.escape, sorted(words, key=len, reverse=True))) + r')\w*\b'
+        )
+    
+    return re.compile('|'.join(alternatives), re.IGNORECASE) if alternatives else None
+
+
+def _build_term_automaton(table: dict):
+    automaton = ahocorasick.Automaton()
+    term_keys: Dict[str, Set[int]] = {}
+    term_is_word: Dict[str, int] = {}
+    for term_lower, cid, is_word in zip(table["lower"], table["cat_id"], table["is_word"]):
+        if _is_ac_term(term_lower, is_word):
+            term_keys.setdefault(term_lower, set()).add(cid)
+            term_is_word[term_lower] = is_word
+    
+    for term_lower, is_word in term_is_word.items():
+        automaton.add_word(term_lower, (term_lower, is_word))
+    automaton.make_automaton()
+    return automaton, term_keys
+
+
+def _load_toxic_terms() -> dict:
+    global _TOXIC_TERM_PATTERNS, _TOXIC_TERM_TABLE
+    global _TOXIC_AC, _TOXIC_AC_KEYS
+    if _TOXIC_TERM_PATTERNS is None:
+        with _toxic_terms_lock:
+            if _TOXIC_TERM_PATTERNS is None:
+                with open(_TOXIC_TERMS_PATH, 'r', encoding='utf-8') as f:
+                    toxic_data = json.load(f)
+                
+                table = _build_term_table(toxic_data)
+                
+                _TOXIC_AC, _TOXIC_AC_KEYS = _build_term_automaton(table)
+                
+                compiled = {
+                    key: _compile_toxic_terms(table, cid, skip_ac_terms=True)
+                    for key, cid in table["categories"].items()
+                }
+                compiled[_ALL_TOXIC_TERMS] = _compile_toxic_terms(table, None, skip_ac_terms=True)
+                
+                _TOXIC_TERM_TABLE = table
+                _TOXIC_TERM_PATTERNS = compiled
+    return _TOXIC_TERM_PATTERNS
+
+
+@lru_cache(maxsize=4096)
+def _word_pattern(term_lower: str) -> re.Pattern:
+    return re.compile(r'\b' + re.escape(term_lower) + r'\w*\b', re.IGNORECASE)
+
+
+@lru_cache(maxsize=4096)
+def _phrase_pattern(term_lower: str) -> re.Pattern:
+    return re.compile(re.escape(term_lower), re.IGNORECASE)
+
+
+@lru_cache(maxsize=64)
+def _caseless_toxic_pattern(cid: Optional[int]) -> Optional[re.Pattern]:
+    return _compile_toxic_terms(_TOXIC_TERM_TABLE, cid)
+
+
+_SUGGESTION_TEMPLATES = {
+    "severe_profanity": "Remove the profane language: \"{matched_text}\". Use professional language instead.",
+    "mild_profanity": "Consider removing \"{matched_text}\" for a more professional tone.",
+    "personal_attack": "Remove the personal attack: \"{matched_text}\". Focus on the investment argument.",
+    "hate_speech": "Remove hate speech content. This type of language is not acceptable.",
+    "threat": "Remove threatening language: \"{matched_text}\". Keep content civil.",
+    "harassment": "Remove harassment: \"{matched_text}\". Maintain respectful discourse.",
+    "defamation": "Remove potentially defamatory statement about: \"{matched_text}\".",
+    "scam": "Remove scam-like language: \"{matched_text}\". Avoid guaranteed returns claims.",
+    "off_topic": "Ensure your content focuses on investment analysis and financial strategy.",
+    "low_finance_relevance": "Add more specific financial data, metrics, and investment reasoning.",
+    "external_redirect": "Remove external links or contact info: \"{matched_text}\".",
+    "spam": "Remove promotional content and marketing language.",
+}
+
+_SUGGESTION_ITEMS = tuple(_SUGGESTION_TEMPLATES.items())
+
+_SUGGESTION_ALIASES = {
+    "scam (misspelled)": "scam",
+    "similar to scam": "scam",
+}
+
+
+@lru_cache(maxsize=256)
+def _suggestion_template(issue_type_lower: str) -> Optional[str]:
+    key = _SUGGESTION_ALIASES.get(issue_type_lower, issue_type_lower)
+    template = _SUGGESTION_TEMPLATES.get(key)
+    if template is None:
+        for key, candidate in _SUGGESTION_ITEMS:
+            if key in issue_type_lower:
+                return candidate
+    return template
+
+
 def _get_detailed_suggestion(issue_type: str, matched_text: str) -> str:
-    suggestions = {
-        "severe_profanity": f"Remove the profane language: \"{matched_text}\". Use professional language instead.",
-        "mild_profanity": f"Consider removing \"{matched_text}\" for a more professional tone.",
-        "personal_attack": f"Remove the personal attack: \"{matched_text}\". Focus on the investment argument.",
-        "hate_speech": "Remove hate speech content. This type of language is not acceptable.",
-        "threat": f"Remove threatening language: \"{matched_text}\". Keep content civil.",
-        "harassment": f"Remove harassment: \"{matched_text}\". Maintain respectful discourse.",
-        "defamation": f"Remove potentially defamatory statement about: \"{matched_text}\".",
-        "scam": f"Remove scam-like language: \"{matched_text}\". Avoid guaranteed returns claims.",
-        "off_topic": "Ensure your content focuses on investment analysis and financial strategy.",
-        "low_finance_relevance": "Add more specific financial data, metrics, and investment reasoning.",
-        "external_redirect": f"Remove external links or contact info: \"{matched_text}\".",
-        "spam": "Remove promotional content and marketing language.",
-    }
-    
-    for key, suggestion in suggestions.items():
-        if key in issue_type.lower():
-            return suggestion
+    template = _suggestion_template(issue_type.lower())
+    if template is not None:
+        return template.format(matched_text=matched_text)
     
     return f"Review and revise: \"{matched_text[:50]}...\""
 
 
-def _find_text_in_content(text: str, term: str) -> str:
-    import re
-    text_lower = text.lower()
+def _find_word(text: str, text_lower: str, term_lower: str) -> Optional[Tuple[int, int]]:
+    # Offsets in text_lower only index text when lower() kept every character
+    # one character long ('İ' lowers to two); otherwise match caselessly.
+    if len(text_lower) != len(text):
+        match = _word_pattern(term_lower).search(text)
+        return match.span() if match else None
+    
+    if _PLAIN_WORD.fullmatch(term_lower) is None:
+        if term_lower not in text_lower:
+            return None
+        match = _word_pattern(term_lower).search(text)
+        return match.span() if match else None
+    
+    # \bterm\w*\b for a plain \w+ term: first occurrence not preceded by a
+    # word character, extended to the end of that word.
+    pos = text_lower.find(term_lower)
+    while pos != -1:
+        if pos == 0 or not _is_word_char(text_lower[pos - 1]):
+            return pos, _WORD_TAIL.match(text_lower, pos + len(term_lower)).end()
+        pos = text_lower.find(term_lower, pos + 1)
+    return None
+
+
+def _find_phrase(text: str, text_lower: str, term_lower: str) -> Optional[Tuple[int, int]]:
+    if len(text_lower) != len(text):
+        match = _phrase_pattern(term_lower).search(text)
+        return match.span() if match else None
+    pos = text_lower.find(term_lower)
+    return (pos, pos + len(term_lower)) if pos != -1 else None
+
+
+def _find_text_in_content(text: str, text_lower: str, term: str) -> str:
     term_lower = term.lower()
     
-    # For single words, use word boundary matching to get exact word
-    if ' ' not in term_lower and len(term_lower) <= 20:
-        pattern = r'\b' + re.escape(term_lower) + r'\w*\b'
-        match = re.search(pattern, text_lower)
-        if match:
-            return text[match.start():match.end()]
+    # Phrases are plain substrings; single words use word boundary matching
+    if ' ' in term_lower or len(term_lower) > 20:
+        span = _find_phrase(text, text_lower, term_lower)
     else:
-        pos = text_lower.find(term_lower)
-        if pos != -1:
-            return text[pos:pos+len(term)]
+        span = _find_word(text, text_lower, term_lower)
+    if span:
+        return text[span[0]:span[1]]
     
     return term
 
 
+def _short_content_response(explanation: str) -> ModerationResponse:
+    return ModerationResponse.model_construct(
+        decision="FLAG",
+        risk_score=0.0,
+        is_finance_related=False,
+        issues=[],
+        explanation=explanation,
+        can_proceed=False
+    )
+
+
+def check_trivial_content(text: str) -> Optional[ModerationResponse]:
+    stripped_len = len(text.strip()) if text else 0
+    if stripped_len == 0:
+        return _short_content_response("Content is empty")
+    if stripped_len < MIN_MODERATION_CHARS:
+        return _short_content_response("Content too short to analyze")
+    return None
+
+
 def moderate_content(text: str) -> ModerationResponse:
+    trivial = check_trivial_content(text)
+    if trivial is not None:
+        return trivial
+    
     moderator = get_moderator()
     result = moderator.moderate(text)
+    text_lower = text.lower()
     
     issues = []
     
@@ -112,10 +369,10 @@ def moderate_content(text: str) -> ModerationResponse:
                 matched_text = parts[2].strip()
             elif len(parts) == 2:
                 issue_type = parts[1].strip()
-                matched_text = _find_flagged_toxic_word(text, issue_type)
+                matched_text = _find_flagged_toxic_word(text, text_lower, issue_type)
             else:
                 issue_type = "toxicity"
-                matched_text = _find_flagged_toxic_word(text, issue_type)
+                matched_text = _find_flagged_toxic_word(text, text_lower, issue_type)
         elif flag_type == "scam":
             issue_type = "scam"
             matched_text = parts[1].strip() if len(parts) > 1 else "promotional content"
@@ -129,9 +386,9 @@ def moderate_content(text: str) -> ModerationResponse:
             issue_type = flag_type
             matched_text = parts[1].strip() if len(parts) > 1 else flag_type
         
-        found_excerpt = _find_text_in_content(text, matched_text) if matched_text else issue_type
+        found_excerpt = _find_text_in_content(text, text_lower, matched_text) if matched_text else issue_type
         
-        issues.append(ModerationIssue(
+        issues.append(ModerationIssue.model_construct(
             type=issue_type.replace("_", " ").title(),
             found=found_excerpt,
             suggestion=_get_detailed_suggestion(issue_type, matched_text)
@@ -140,82 +397,92 @@ def moderate_content(text: str) -> ModerationResponse:
     decision = result.get("decision", "FLAG")
     can_proceed = decision == "PASS"
     
-    return ModerationResponse(
+    return ModerationResponse.model_construct(
         decision=decision,
-        risk_score=result.get("risk_score", 0.0),
-        is_finance_related=result.get("is_finance_related", False),
+        risk_score=float(result.get("risk_score", 0.0)),
+        is_finance_related=bool(result.get("is_finance_related", False)),
         issues=issues,
         explanation=result.get("explanation", ""),
         can_proceed=can_proceed
     )
 
 
-def _find_flagged_toxic_word(text: str, category: str) -> str:
-    import json
-    import re
-    from pathlib import Path
-    
-    text_lower = text.lower()
-    
-    data_path = Path(__file__).parent / "content_moderation" / "data" / "toxic_terms.json"
-    
+def _find_flagged_toxic_word(text: str, text_lower: str, category: str) -> str:
     try:
-        with open(data_path, 'r', encoding='utf-8') as f:
-            toxic_data = json.load(f)
+        compiled = _load_toxic_terms()
     except Exception:
         return category.replace("_", " ")
     
-    category_mapping = {
-        "severe_profanity": "severe_profanity",
-        "mild_profanity": "mild_profanity",
-        "personal_attack": "personal_attacks",
-        "hate_speech": "hate_speech_patterns",
-        "threat": "threat_patterns",
-        "harassment": "harassment_patterns",
-        "mockery": "mockery_patterns",
-        "doxxing": "doxxing_patterns",
-        "defamation": "defamation_patterns",
-        "spam": "spam_indicators",
-    }
-    
-    json_key = None
+    json_key = _ALL_TOXIC_TERMS
     category_lower = category.lower()
-    for cat_name, key in category_mapping.items():
+    for cat_name, key in _TOXIC_CATEGORY_KEYS.items():
         if cat_name in category_lower:
             json_key = key
             break
     
-    if json_key:
-        terms_to_check = toxic_data.get(json_key, [])
+    # None selects every category; -1 a category missing from the JSON.
+    cid = None
+    if json_key != _ALL_TOXIC_TERMS:
+        cid = _TOXIC_TERM_TABLE["categories"].get(json_key, -1)
+    
+    # Same length check as _find_word: text_lower offsets must index text.
+    if len(text_lower) != len(text):
+        pattern = _caseless_toxic_pattern(cid) if cid != -1 else None
+        match = pattern.search(text) if pattern is not None else None
+        found = match.group() if match else None
     else:
-        terms_to_check = []
-        for key, terms in toxic_data.items():
-            if isinstance(terms, list):
-                terms_to_check.extend(terms)
+        found = _ac_find_toxic_word(text, text_lower, cid, compiled.get(json_key))
     
-    for term in terms_to_check:
-        term_lower = term.lower()
-        
-        if ' ' not in term_lower and len(term_lower) <= 15:
-            pattern = r'\b' + re.escape(term_lower) + r'\w*\b'
-            match = re.search(pattern, text_lower)
-            if match:
-                return text[match.start():match.end()]
+    return found or category.replace("_", " ")
+
+
+def _ac_find_toxic_word(text: str, text_lower: str, cid: Optional[int],
+                        fallback_pattern: Optional[re.Pattern]) -> Optional[str]:
+    # Candidates rank by start, then phrases before words, then longest,
+    # which is the order the combined regex would pick them in.
+    best = None
+    for end, (term_lower, is_word) in _TOXIC_AC.iter(text_lower):
+        if cid is not None and cid not in _TOXIC_AC_KEYS[term_lower]:
+            continue
+        start = end - len(term_lower) + 1
+        if is_word:
+            if start > 0 and _is_word_char(text_lower[start - 1]):
+                continue
+            stop = _WORD_TAIL.match(text_lower, end + 1).end()
         else:
-            pos = text_lower.find(term_lower)
-            if pos != -1:
-                return text[pos:pos + len(term)]
+            stop = end + 1
+        candidate = (start, is_word, -stop)
+        if best is None or candidate < best:
+            best = candidate
     
-    return category.replace("_", " ")
+    match = fallback_pattern.search(text) if fallback_pattern is not None else None
+    if match:
+        candidate = (match.start(), 1, -match.end())
+        if best is None or candidate < best:
+            best = candidate
+    
+    return text[best[0]:-best[2]] if best else None
+
+
+_review_counter = itertools.count()
+
+
+def _new_review_id() -> str:
+    # Microsecond timestamp + pid + counter: unique across workers, time-sortable.
+    raw = struct.pack(
+        ">QHH",
+        time.time_ns() // 1000,
+        os.getpid() & 0xFFFF,
+        next(_review_counter) & 0xFFFF,
+    )
+    return base64.b32encode(raw[1:]).decode("ascii").rstrip("=")
 
 
 def submit_manual_review(request: ManualReviewRequest) -> ManualReviewResponse:
-    import uuid
-    review_id = str(uuid.uuid4())[:8]
+    review_id = _new_review_id()
     
-    print(f"[ManualReview] Submitted review {review_id} from {request.user_email}")
-    print(f"[ManualReview] Reason: {request.reason}")
-    print(f"[ManualReview] Text length: {len(request.text)} chars")
+    logger.info("Manual review %s submitted by %s (%d chars): %s",
+                review_id, request.user_email, len(request.text), request.reason)
     
     return ManualReviewResponse(
         status="submitted",
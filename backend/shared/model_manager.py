@@ -1,24 +1,46 @@
+import os
+import threading
 
 
 _spacy_nlp = None
 _sentence_transformer = None
 _verbose = True
 
+# Held while a model loads so concurrent first callers don't load it twice.
+_spacy_lock = threading.Lock()
+_sentence_transformer_lock = threading.Lock()
+
+# Intra-op threads per process. Inference already runs in one worker process
+# per core, so letting torch/ONNX Runtime also spread across every core only
+# oversubscribes the CPU.
+MODEL_NUM_THREADS = int(os.getenv("MODEL_NUM_THREADS", 1))
+
+# "onnx" runs the int8 dynamically-quantized export that ships with
+# all-MiniLM-L6-v2 through ONNX Runtime, falling back to PyTorch dynamic
+# int8 quantization; "torch" keeps the FP32 model. The unsigned-int8
+# AVX2 export is accurate on any x86 CPU; the VNNI one is opt-in.
+SENTENCE_TRANSFORMER_BACKEND = os.getenv("SENTENCE_TRANSFORMER_BACKEND", "onnx")
+SENTENCE_TRANSFORMER_ONNX_FILE = os.getenv(
+    "SENTENCE_TRANSFORMER_ONNX_FILE", "onnx/model_quint8_avx2.onnx"
+)
+
 
 def get_spacy():
     
     global _spacy_nlp
     if _spacy_nlp is None:
-        import spacy
-        try:
-            _spacy_nlp = spacy.load("en_core_web_sm")
-            if _verbose:
-                print("[ModelManager] spaCy model loaded (en_core_web_sm)")
-        except OSError as e:
-            raise RuntimeError(
-                "spaCy model 'en_core_web_sm' not found. "
-                "Run: python -m spacy download en_core_web_sm"
-            ) from e
+        with _spacy_lock:
+            if _spacy_nlp is None:
+                import spacy
+                try:
+                    _spacy_nlp = spacy.load("en_core_web_sm")
+                    if _verbose:
+                        print("[ModelManager] spaCy model loaded (en_core_web_sm)")
+                except OSError as e:
+                    raise RuntimeError(
+                        "spaCy model 'en_core_web_sm' not found. "
+                        "Run: python -m spacy download en_core_web_sm"
+                    ) from e
     return _spacy_nlp
 
 
@@ -31,13 +53,55 @@ def get_sentence_transformer():
     
     global _sentence_transformer
     if _sentence_transformer is None:
-        from sentence_transformers import SentenceTransformer
-        _sentence_transformer = SentenceTransformer("all-MiniLM-L6-v2")
-        if _verbose:
-            print("[ModelManager] SentenceTransformer loaded (all-MiniLM-L6-v2)")
+        with _sentence_transformer_lock:
+            if _sentence_transformer is None:
+                _sentence_transformer = _load_sentence_transformer()
     return _sentence_transformer
 
 
+def _load_sentence_transformer():
+    from sentence_transformers import SentenceTransformer
+    if SENTENCE_TRANSFORMER_BACKEND == "onnx":
+        try:
+            import onnxruntime
+            session_options = onnxruntime.SessionOptions()
+            session_options.intra_op_num_threads = MODEL_NUM_THREADS
+            model = SentenceTransformer(
+                "all-MiniLM-L6-v2",
+                backend="onnx",
+                model_kwargs={
+                    "file_name": SENTENCE_TRANSFORMER_ONNX_FILE,
+                    "provider": "CPUExecutionProvider",
+                    "session_options": session_options,
+                },
+            )
+            if _verbose:
+                print(f"[ModelManager] SentenceTransformer loaded (all-MiniLM-L6-v2, ONNX {SENTENCE_TRANSFORMER_ONNX_FILE})")
+            return model
+        except Exception as e:
+            if _verbose:
+                print(f"[ModelManager] ONNX backend unavailable, falling back to PyTorch int8: {e}")
+    
+    import torch
+    torch.set_num_threads(MODEL_NUM_THREADS)
+    model = SentenceTransformer("all-MiniLM-L6-v2")
+    if SENTENCE_TRANSFORMER_BACKEND == "onnx":
+        # Still keep the int8 footprint when ONNX Runtime is missing.
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        if _verbose:
+            print("[ModelManager] SentenceTransformer loaded (all-MiniLM-L6-v2, PyTorch dynamic int8)")
+    elif _verbose:
+        print("[ModelManager] SentenceTransformer loaded (all-MiniLM-L6-v2)")
+    return model
+
+
+def preload_models():
+    
+    get_spacy()
+    # One encode so the runtime sets up its kernels before the first request.
+    get_sentence_transformer().encode(["warmup"], show_progress_bar=False)
+
+
 def is_sentence_transformer_loaded():
     
     return _sentence_transformer is not None
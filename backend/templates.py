@@ -135,16 +135,28 @@ def classify_by_embedding(sentence: str) -> Tuple[str, float]:
 
 
 def get_embedding_vote(sentence: str) -> Dict[str, float]:
+    return get_embedding_votes([sentence])[0]
+
+
+def get_embedding_votes(sentences: List[str], batch_size: int = 32) -> List[Dict[str, float]]:
+    if not sentences:
+        return []
+    
     model = get_sentence_transformer()
     templates = get_template_embeddings()
     
-    sent_embedding = model.encode([sentence], convert_to_numpy=True)[0]
+    # One encode call lets SentenceTransformers length-sort and pad per mini-batch.
+    sent_embeddings = model.encode(
+        sentences, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False
+    )
+    sent_norms = np.linalg.norm(sent_embeddings, axis=1)
     
-    scores = {}
+    votes = [{} for _ in sentences]
     for sent_type, template_embeds in templates.items():
-        similarities = np.dot(template_embeds, sent_embedding) / (
-            np.linalg.norm(template_embeds, axis=1) * np.linalg.norm(sent_embedding)
+        similarities = np.dot(template_embeds, sent_embeddings.T) / (
+            np.linalg.norm(template_embeds, axis=1)[:, None] * sent_norms[None, :]
         )
-        scores[sent_type] = float(np.max(similarities))
+        for vote, best in zip(votes, similarities.max(axis=0)):
+            vote[sent_type] = float(best)
     
-    return scores
+    return votes
@@ -12,6 +12,7 @@ function App() {
     // States: upload | moderating | moderation_blocked | loading | dashboard
     const [view, setView] = useState('upload');
     const [analysisResult, setAnalysisResult] = useState(null);
+    const [partialResult, setPartialResult] = useState(null);
     const [moderationResult, setModerationResult] = useState(null);
     const [currentText, setCurrentText] = useState('');
     const [error, setError] = useState(null);
@@ -34,8 +35,9 @@ function App() {
             }
 
             // Step 2: Proceed to thesis analysis
+            setPartialResult(null);
             setView('loading');
-            const result = await analyzeThesis(thesisText);
+            const result = await analyzeThesis(thesisText, setPartialResult);
             setAnalysisResult(result);
             setView('dashboard');
 
@@ -62,6 +64,7 @@ function App() {
 
     const handleReset = () => {
         setAnalysisResult(null);
+        setPartialResult(null);
         setModerationResult(null);
         setCurrentText('');
         setError(null);
@@ -129,7 +132,7 @@ function App() {
                         exit={{ opacity: 0 }}
                         transition={{ duration: 0.3 }}
                     >
-                        <LoadingState message="Analyzing thesis strength..." />
+                        <LoadingState message="Analyzing thesis strength..." partial={partialResult} />
                     </motion.div>
                 )}
 
@@ -19,19 +19,56 @@ export const moderateContent = async (text) => {
 /**
  * Step 2: Thesis Strength Analysis
  * Only called after moderation returns can_proceed = true
+ *
+ * The backend streams the report as NDJSON, one section per line. Sections
+ * are merged in order (later lines refine the provisional ML results), and
+ * onSection, if given, receives the partial report after every line.
  */
-export const analyzeThesis = async (thesisText) => {
+export const analyzeThesis = async (thesisText, onSection) => {
     // Backend expects a file upload (UploadFile), so we convert text to a Blob
     const formData = new FormData();
     const blob = new Blob([thesisText], { type: 'text/plain' });
     formData.append('file', blob, 'thesis.txt');
 
-    const response = await axios.post(`${API_BASE}/analyze`, formData, {
-        headers: {
-            'Content-Type': 'multipart/form-data',
-        },
+    const response = await fetch(`${API_BASE}/analyze`, {
+        method: 'POST',
+        headers: { Accept: 'application/x-ndjson' },
+        body: formData,
     });
-    return response.data;
+
+    if (!response.ok) {
+        // Same shape as an axios error so callers can read response.data.detail
+        const error = new Error(`Request failed with status code ${response.status}`);
+        error.response = {
+            status: response.status,
+            data: await response.json().catch(() => ({})),
+        };
+        throw error;
+    }
+
+    const result = {};
+    const applyLine = (line) => {
+        if (!line.trim()) return;
+        const section = JSON.parse(line);
+        if (section.error) throw new Error(section.error);
+        Object.assign(result, section);
+        if (onSection) onSection({ ...result });
+    };
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = '';
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffered += decoder.decode(value, { stream: true });
+        const lines = buffered.split('\n');
+        buffered = lines.pop();
+        lines.forEach(applyLine);
+    }
+    applyLine(buffered + decoder.decode());
+
+    return result;
 };
 
 /**
@@ -10,7 +10,7 @@ const steps = [
     'Generating Report'
 ];
 
-export default function LoadingState({ message = "Analyzing Your Thesis" }) {
+export default function LoadingState({ message = "Analyzing Your Thesis", partial = null }) {
     return (
         <div className="min-h-screen flex flex-col items-center justify-center px-4">
             <motion.div
@@ -97,6 +97,28 @@ export default function LoadingState({ message = "Analyzing Your Thesis" }) {
                     ))}
                 </div>
 
+                {/* Preliminary ML results streamed ahead of the LLM step */}
+                {partial?.component_scores && (
+                    <motion.div
+                        initial={{ opacity: 0, y: 10 }}
+                        animate={{ opacity: 1, y: 0 }}
+                        className="max-w-sm mx-auto mt-6 p-4 rounded-xl gradient-card border border-dark-border text-left"
+                    >
+                        <p className="text-xs uppercase tracking-wide text-gray-500 mb-2">Preliminary ML scores</p>
+                        {Object.entries(partial.component_scores).map(([key, component]) => (
+                            <div key={key} className="flex justify-between text-sm text-gray-300">
+                                <span>{component.name}</span>
+                                <span>{component.score}/{component.max}</span>
+                            </div>
+                        ))}
+                        {partial.quick_stats && (
+                            <p className="text-xs text-gray-500 mt-2">
+                                {partial.quick_stats.total_sentences} sentences, {partial.quick_stats.facts} facts, {partial.quick_stats.opinions} opinions
+                            </p>
+                        )}
+                    </motion.div>
+                )}
+
                 <motion.div
                     className="mt-8 flex items-center gap-2 text-gray-500"
                     animate={{ opacity: [0.5, 1, 0.5] }}